@@ -1,27 +1,129 @@
 # Standard library imports
 import os
-from datetime import datetime
+import time
+import json
+import hashlib
+import functools
+import dataclasses
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
 from typing import Dict, Any
 from pathlib import Path
 
 # Third-party imports
-import requests
 import pandas as pd
 import numpy as np
 import anthropic
 from dotenv import load_dotenv
 import openmeteo_requests
 import requests_cache
+from requests.adapters import HTTPAdapter
 from retry_requests import retry
 
 # Initialize clients
 load_dotenv()
-client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+
+@functools.cache
+def _get_client():
+    """Create the Anthropic client on first use, so importing this module stays cheap"""
+    return anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+
+def warm_clients():
+    """Build the Anthropic client ahead of the first analysis, e.g. from a startup thread"""
+    _get_client()
+
+# Models for the analysis: fast by default, with a slower higher-quality option
+DEFAULT_MODEL = "claude-3-5-haiku-20241022"
+QUALITY_MODEL = "claude-3-5-sonnet-20241022"
+
+# Setup the Open-Meteo API client with cache and retry, shared with geocoding.
+# Model projections are static, so responses are kept for a week and geocoding
+# results longer still; an expired entry is served if the API errors.
+# Set CFE_HTTP_CACHE_MEMORY=1 to keep the cache off disk (e.g. on an SD card).
+cache_session = requests_cache.CachedSession(
+    backend=requests_cache.SQLiteCache('.cache', use_memory=os.getenv('CFE_HTTP_CACHE_MEMORY') == '1'),
+    expire_after=timedelta(days=7),
+    urls_expire_after={'geocoding-api.open-meteo.com': timedelta(days=30)},
+    allowable_codes=(200,),
+    stale_if_error=True
+)
+retry_session = retry(cache_session, retries=3, backoff_factor=0.5)
+# Keep more warm HTTPS connections than the default so concurrent sessions don't redo TLS handshakes
+retry_session.mount('https://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=retry_session.get_adapter('https://').max_retries
+))
+openmeteo = openmeteo_requests.Client(session=retry_session)
+
+# Daily variables requested from the climate API, in response order
+DAILY_VARIABLES = [
+    "temperature_2m_mean",
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "wind_speed_10m_max",
+    "cloud_cover_mean",
+    "shortwave_radiation_sum",
+    "relative_humidity_2m_max",
+    "relative_humidity_2m_min",
+    "precipitation_sum",
+    "snowfall_sum"
+]
+
+# Column of each climate variable in the ClimateFrame value matrix
+VARIABLE_INDEX = {variable: i for i, variable in enumerate(DAILY_VARIABLES)}
+
+# Variables accumulated over each month; all others are averaged
+MONTHLY_SUM_COLUMNS = [
+    "shortwave_radiation_sum",
+    "precipitation_sum",
+    "snowfall_sum"
+]
+
+# Season names
+SEASONS = ['winter', 'spring', 'summer', 'autumn']
+
+# Index into SEASONS for each calendar month (January first)
+MONTH_SEASON_CODES = np.array([0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype=np.int8)
+
+def _single_flight(func):
+    """Let concurrent callers with the same arguments share one call instead of each missing the cache"""
+    in_flight: Dict[tuple, Future] = {}
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        with lock:
+            future = in_flight.get(args)
+            owner = future is None
+            if owner:
+                future = in_flight[args] = Future()
+        if owner:
+            try:
+                future.set_result(func(*args))
+            except Exception as error:
+                future.set_exception(error)
+            finally:
+                with lock:
+                    del in_flight[args]
+        return future.result()
+    return wrapper
 
 def get_location_data(address):
     """Get latitude, longitude and location name from address"""
-    geocoding_url = f"https://geocoding-api.open-meteo.com/v1/search?name={address}&count=1"
-    response = requests.get(geocoding_url)
+    # Geocoding search is case-insensitive, so case and spacing variants share one cache entry
+    return _get_location_data_cached(" ".join(address.lower().split()))
+
+@_single_flight
+@functools.lru_cache(maxsize=4096)
+def _get_location_data_cached(address):
+    """Geocode an address, memoized on the normalized address"""
+    response = retry_session.get(
+        "https://geocoding-api.open-meteo.com/v1/search",
+        params={"name": address, "count": 1},
+        timeout=5
+    )
     data = response.json()
     
     if data.get("results"):
@@ -32,32 +134,87 @@ def get_location_data(address):
         )
     return None
 
+@dataclasses.dataclass(frozen=True)
+class ClimateFrame:
+    """Monthly climate data together with the read-only arrays the analysis reads, derived once"""
+    df: pd.DataFrame
+    years: np.ndarray
+    seasons: np.ndarray
+    values: np.ndarray  # (months x DAILY_VARIABLES) float32 matrix
+    year_starts: np.ndarray  # Row index where each year begins
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> 'ClimateFrame':
+        """Build from a monthly DataFrame, sorting it by date if needed"""
+        if not df['date'].is_monotonic_increasing:
+            df = df.sort_values('date', ignore_index=True)
+        years = df['year'].to_numpy()
+        arrays = {
+            'years': years,
+            'seasons': df['season'].to_numpy(),
+            'values': np.ascontiguousarray(df[DAILY_VARIABLES].to_numpy(dtype=np.float32)),
+            'year_starts': np.flatnonzero(np.diff(years, prepend=years[:1] - 1))
+        }
+        for array in arrays.values():
+            array.flags.writeable = False
+        return cls(df=df, **arrays)
+
 def get_climate_data(lat, lon, start_date="1950-01-01", end_date="2050-12-31"):
     """Fetch comprehensive climate data and aggregate to monthly"""
-    # Setup the Open-Meteo API client with cache and retry
-    cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-    retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-    openmeteo = openmeteo_requests.Client(session=retry_session)
-
+    # Round to ~11km, still finer than the model grid, so nearby coordinates share one cached result
+    frame = _get_climate_data_cached(round(lat, 1), round(lon, 1), start_date, end_date)
+    # The arrays are read-only and can be shared; only the frame needs protecting
+    return dataclasses.replace(frame, df=frame.df.copy())
+
+# Monthly frames persisted across restarts, refetched once older than this
+MONTHLY_CACHE_DIR = Path('.cache') / 'monthly'
+MONTHLY_CACHE_MAX_AGE = 30 * 86400
+
+@_single_flight
+@functools.lru_cache(maxsize=1024)
+def _get_climate_data_cached(lat, lon, start_date, end_date):
+    """Load or fetch climate data, memoized on rounded coordinates and persisted as Parquet"""
+    key = hashlib.blake2b(repr((lat, lon, start_date, end_date)).encode(), digest_size=16).hexdigest()
+    path = MONTHLY_CACHE_DIR / f"{key}.parquet"
+    try:
+        if time.time() - path.stat().st_mtime < MONTHLY_CACHE_MAX_AGE:
+            return ClimateFrame.from_df(pd.read_parquet(path))
+    except FileNotFoundError:
+        pass
+
+    monthly_df = _fetch_monthly_data(lat, lon, start_date, end_date)
+    _write_atomically(path, lambda partial_path: monthly_df.to_parquet(partial_path, compression='zstd'))
+    _prune_cache_dir(MONTHLY_CACHE_DIR, MONTHLY_CACHE_MAX_AGE)
+
+    return ClimateFrame.from_df(monthly_df)
+
+def _write_atomically(path, write):
+    """Write a cache file beside its target and rename, so concurrent readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    write(partial_path)
+    partial_path.replace(path)
+
+def _prune_cache_dir(directory, max_age):
+    """Delete cache files older than max_age, so entries never requested again don't accumulate"""
+    cutoff = time.time() - max_age
+    for path in directory.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except FileNotFoundError:
+            pass  # Already removed by a concurrent prune
+
+def _fetch_monthly_data(lat, lon, start_date, end_date):
+    """Fetch daily climate data from Open-Meteo and aggregate it to monthly"""
     url = "https://climate-api.open-meteo.com/v1/climate"
     params = {
         "latitude": lat,
         "longitude": lon,
         "start_date": start_date,
         "end_date": end_date,
-        "models": ["MRI_AGCM3_2_S", "EC_Earth3P_HR"],
-        "daily": [
-            "temperature_2m_mean",
-            "temperature_2m_max",
-            "temperature_2m_min",
-            "wind_speed_10m_max",
-            "cloud_cover_mean",
-            "shortwave_radiation_sum",
-            "relative_humidity_2m_max",
-            "relative_humidity_2m_min",
-            "precipitation_sum",
-            "snowfall_sum"
-        ]
+        "models": "MRI_AGCM3_2_S",
+        "daily": DAILY_VARIABLES
     }
 
     responses = openmeteo.weather_api(url, params=params)
@@ -66,189 +223,204 @@ def get_climate_data(lat, lon, start_date="1950-01-01", end_date="2050-12-31"):
     # Process daily data
     daily = response.Daily()
     
-    # Create daily DataFrame
-    daily_data = {
-        "date": pd.date_range(
-            start=pd.to_datetime(daily.Time(), unit="s", utc=True),
-            end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
-            freq=pd.Timedelta(seconds=daily.Interval()),
-            inclusive="left"
-        ),
-        "temperature_2m_mean": daily.Variables(0).ValuesAsNumpy(),
-        "temperature_2m_max": daily.Variables(1).ValuesAsNumpy(),
-        "temperature_2m_min": daily.Variables(2).ValuesAsNumpy(),
-        "wind_speed_10m_max": daily.Variables(3).ValuesAsNumpy(),
-        "cloud_cover_mean": daily.Variables(4).ValuesAsNumpy(),
-        "shortwave_radiation_sum": daily.Variables(5).ValuesAsNumpy(),
-        "relative_humidity_2m_max": daily.Variables(6).ValuesAsNumpy(),
-        "relative_humidity_2m_min": daily.Variables(7).ValuesAsNumpy(),
-        "precipitation_sum": daily.Variables(8).ValuesAsNumpy(),
-        "snowfall_sum": daily.Variables(9).ValuesAsNumpy()
+    # Days of a month are contiguous, so each month is a run starting at a boundary
+    days = np.arange(daily.Time(), daily.TimeEnd(), daily.Interval()).astype('datetime64[s]')
+    months = days.astype('datetime64[M]')
+    starts = np.concatenate(([0], np.flatnonzero(months[1:] != months[:-1]) + 1))
+    month_index = months[starts].astype(np.int64)
+
+    # Dates in milliseconds, the unit Parquet stores them in, so cached frames read back identical
+    monthly_data = {
+        "date": pd.to_datetime(months[starts].astype('datetime64[ms]'), utc=True),
+        "year": (month_index // 12 + 1970).astype(np.int16),
+        "month": (month_index % 12 + 1).astype(np.int8),
+        "season": MONTH_SEASON_CODES[month_index % 12]
     }
 
-    daily_df = pd.DataFrame(data=daily_data)
-
-    # Aggregate to monthly
-    monthly_df = daily_df.set_index('date').resample('M').agg({
-        'temperature_2m_mean': 'mean',
-        'temperature_2m_max': 'mean',
-        'temperature_2m_min': 'mean',
-        'wind_speed_10m_max': 'mean',
-        'cloud_cover_mean': 'mean',
-        'shortwave_radiation_sum': 'sum',
-        'relative_humidity_2m_max': 'mean',
-        'relative_humidity_2m_min': 'mean',
-        'precipitation_sum': 'sum',
-        'snowfall_sum': 'sum'
-    }).reset_index()
-
-    return monthly_df
+    # Aggregate to monthly, skipping missing days like a NaN-aware mean/sum
+    for i, variable in enumerate(DAILY_VARIABLES):
+        # Single precision is ample for these variables and halves memory traffic
+        values = daily.Variables(i).ValuesAsNumpy().astype(np.float32, copy=False)
+        missing = np.isnan(values)
+        totals = np.add.reduceat(np.where(missing, 0, values), starts)
+        if variable in MONTHLY_SUM_COLUMNS:
+            monthly_data[variable] = totals
+        else:
+            counts = np.add.reduceat(~missing, starts, dtype=np.int32)
+            monthly_data[variable] = np.divide(
+                totals, counts, out=np.full_like(totals, np.nan), where=counts > 0
+            )
+
+    # The arrays are freshly allocated above, so the frame can adopt them without a copy
+    return pd.DataFrame(monthly_data, copy=False)
 
 # Basic climate metrics functions
-def calculate_temp_mean(data, year):
-    """Calculate mean temperature for a given year"""
-    # Filter rows for current year and calculate mean of temperature_2m_mean
-    temp_mean = (
-        data[data['date'].dt.year == year]
-        ['temperature_2m_mean']
-        .mean()
-    )
-    return temp_mean
-
-def calculate_seasonal_metrics(df, year):
-    """Calculate seasonal statistics for a given year"""
-    # Define seasons by months
-    df = df[df['date'].dt.year == year]
-    df['season'] = df['date'].dt.month.map({12:'winter', 1:'winter', 2:'winter',
-                                          3:'spring', 4:'spring', 5:'spring',
-                                          6:'summer', 7:'summer', 8:'summer',
-                                          9:'fall', 10:'fall', 11:'fall'})
+def year_bounds(frame, first_year, last_year):
+    """Row bounds [lo, hi) of the years first_year..last_year in a ClimateFrame"""
+    lo = np.searchsorted(frame.years, first_year, side='left')
+    hi = np.searchsorted(frame.years, last_year, side='right')
+    return lo, hi
+
+# Columns counted for hot days, heavy rain and high wind events, in that order
+EXTREME_EVENT_COLUMNS = [
+    VARIABLE_INDEX['temperature_2m_max'],
+    VARIABLE_INDEX['precipitation_sum'],
+    VARIABLE_INDEX['wind_speed_10m_max']
+]
+
+def seasonal_mean(seasons: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """NaN-skipping mean of each column for each season code, as a (season x column) array"""
+    valid = ~np.isnan(columns)
+    totals = np.zeros((len(SEASONS), columns.shape[1]))
+    counts = np.zeros((len(SEASONS), columns.shape[1]))
+    np.add.at(totals, seasons, np.where(valid, columns, 0))
+    np.add.at(counts, seasons, valid)
+    return np.divide(totals, counts, out=np.full_like(totals, np.nan), where=counts > 0)
+
+def seasonal_reduce(ufunc: np.ufunc, seasons: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """NaN-skipping reduction (np.fmax or np.fmin) of each column for each season code"""
+    out = np.full((len(SEASONS), columns.shape[1]), np.nan)
+    ufunc.at(out, seasons, columns)
+    return out
+
+# Path of every metric in the window statistics, in the order changes are reported
+SEASONAL_METRICS = ('temp_mean', 'temp_max', 'temp_min', 'precip_total', 'wind_max')
+CHANGE_KEYS = (
+    ('means', 'temp_mean'), ('means', 'cloud_cover'), ('means', 'radiation'), ('means', 'humidity_mean'),
+    ('extremes', 'temp_max'), ('extremes', 'temp_min'), ('extremes', 'wind_max'),
+    ('extremes', 'humidity_max'), ('extremes', 'humidity_min'),
+    ('cumulative', 'precip_annual_mean'), ('cumulative', 'precip_monthly_max'),
+    ('cumulative', 'snow_annual_mean'), ('cumulative', 'snow_monthly_max'),
+    ('extreme_events', 'hot_days_annual'), ('extreme_events', 'heavy_rain_annual'),
+    ('extreme_events', 'high_wind_annual'),
+    *(('seasonal', season, metric) for season in SEASONS for metric in SEASONAL_METRICS)
+)
+CHANGE_NAMES = tuple('_'.join(path) + '_change' for path in CHANGE_KEYS)
+
+def window_stat_values(stats: Dict[str, Any]) -> list:
+    """Values of the window statistics at each CHANGE_KEYS path"""
+    return [functools.reduce(dict.__getitem__, path, stats) for path in CHANGE_KEYS]
+
+# Window statistics keyed on window size and a digest of the window's rows, oldest evicted first
+_window_stats_cache: Dict[tuple, Dict[str, Any]] = {}
+WINDOW_STATS_CACHE_SIZE = 32
+
+def get_window_stats(frame: ClimateFrame, center_year: int, window_size: int) -> Dict[str, Any]:
+    """Calculate statistics for a window of years centered on a year, reusing results for identical windows"""
+    lo, hi = year_bounds(frame, center_year - window_size//2, center_year + window_size//2)
     
-    seasonal_stats = df.groupby('season').agg({
-        'temperature_2m_mean': ['mean', 'std'],
-        'precipitation_sum': 'sum',
-        'shortwave_radiation_sum': 'mean'
-    })
-    return seasonal_stats
+    if hi == lo:
+        return None
+
+    # Row views of the frame's contiguous (months x variables) matrix, reduced column-wise in single passes
+    values = frame.values[lo:hi]
+    seasons = frame.seasons[lo:hi]
+    # lo is itself a year start, so the window's year starts are a contiguous run of the frame's
+    year_starts = frame.year_starts[np.searchsorted(frame.year_starts, lo):np.searchsorted(frame.year_starts, hi)] - lo
+    key = (window_size, hashlib.blake2b(values.tobytes() + seasons.tobytes() + year_starts.tobytes()).digest())
+    if key in _window_stats_cache:
+        return _window_stats_cache[key]
+
+    col = VARIABLE_INDEX
+    col_means = np.nanmean(values, axis=0).tolist()
+    col_maxs = np.nanmax(values, axis=0).tolist()
+    col_mins = np.nanmin(values, axis=0).tolist()
+
+    # Exceedances of the 95th percentile, only for the variables with extreme events
+    extreme_values = values[:, EXTREME_EVENT_COLUMNS]
+    thresholds = np.nanpercentile(extreme_values, 95, axis=0)
+    hot_days, heavy_rain, high_wind = (extreme_values > thresholds).sum(axis=0).tolist()
+
+    # Average-based metrics
+    means = {
+        'temp_mean': col_means[col['temperature_2m_mean']],
+        'cloud_cover': col_means[col['cloud_cover_mean']],
+        'radiation': col_means[col['shortwave_radiation_sum']],
+        'humidity_mean': (
+            col_means[col['relative_humidity_2m_max']] + 
+            col_means[col['relative_humidity_2m_min']]
+        ) / 2
+    }
 
-import pandas as pd
-import numpy as np
-from typing import Dict, Any
-from datetime import datetime
+    # Extreme metrics
+    extremes = {
+        'temp_max': col_maxs[col['temperature_2m_max']],
+        'temp_min': col_mins[col['temperature_2m_min']],
+        'wind_max': col_maxs[col['wind_speed_10m_max']],
+        'humidity_max': col_maxs[col['relative_humidity_2m_max']],
+        'humidity_min': col_mins[col['relative_humidity_2m_min']]
+    }
 
-def analyze_climate_data(df: pd.DataFrame, target_date: datetime, window_size: int = 5) -> Dict[str, Any]:
-    """
-    Analyze climate data with sophisticated temporal aggregation.
-    
-    Args:
-        df: DataFrame with climate data
-        target_date: Future date to analyze
-        window_size: Size of window for aggregation (in years)
-    """
-    # Convert date to datetime if needed
-    df['date'] = pd.to_datetime(df['date'])
-    df['year'] = df['date'].dt.year
-    df['month'] = df['date'].dt.month
-
-    def get_window_stats(center_date: datetime) -> Dict[str, Any]:
-        """Calculate statistics for a window centered on a date"""
-        center_year = center_date.year
-        window_data = df[
-            (df['year'] >= center_year - window_size//2) & 
-            (df['year'] <= center_year + window_size//2)
-        ]
-        
-        if len(window_data) == 0:
-            return None
-
-        # Average-based metrics
-        means = {
-            'temp_mean': window_data['temperature_2m_mean'].mean(),
-            'cloud_cover': window_data['cloud_cover_mean'].mean(),
-            'radiation': window_data['shortwave_radiation_sum'].mean(),
-            'humidity_mean': (
-                window_data['relative_humidity_2m_max'].mean() + 
-                window_data['relative_humidity_2m_min'].mean()
-            ) / 2
-        }
+    # Cumulative metrics, summed per year over the contiguous year runs
+    annual_precip, annual_snow = np.add.reduceat(
+        np.nan_to_num(values[:, [col['precipitation_sum'], col['snowfall_sum']]]), year_starts, axis=0
+    ).mean(axis=0).tolist()
 
-        # Extreme metrics
-        extremes = {
-            'temp_max': window_data['temperature_2m_max'].max(),
-            'temp_min': window_data['temperature_2m_min'].min(),
-            'wind_max': window_data['wind_speed_10m_max'].max(),
-            'humidity_max': window_data['relative_humidity_2m_max'].max(),
-            'humidity_min': window_data['relative_humidity_2m_min'].min()
-        }
+    cumulative = {
+        'precip_annual_mean': annual_precip,
+        'precip_monthly_max': col_maxs[col['precipitation_sum']],
+        'snow_annual_mean': annual_snow,
+        'snow_monthly_max': col_maxs[col['snowfall_sum']]
+    }
 
-        # Cumulative metrics
-        annual_stats = window_data.groupby('year').agg({
-            'precipitation_sum': 'sum',
-            'snowfall_sum': 'sum'
-        })
-        
-        cumulative = {
-            'precip_annual_mean': annual_stats['precipitation_sum'].mean(),
-            'precip_monthly_max': window_data['precipitation_sum'].max(),
-            'snow_annual_mean': annual_stats['snowfall_sum'].mean(),
-            'snow_monthly_max': window_data['snowfall_sum'].max()
-        }
+    # Extreme events
+    extreme_events = {
+        'hot_days_annual': hot_days / window_size,
+        'heavy_rain_annual': heavy_rain / window_size,
+        'high_wind_annual': high_wind / window_size
+    }
 
-        # Extreme events
-        temp_95th = window_data['temperature_2m_max'].quantile(0.95)
-        precip_95th = window_data['precipitation_sum'].quantile(0.95)
-        wind_95th = window_data['wind_speed_10m_max'].quantile(0.95)
-
-        extreme_events = {
-            'hot_days_annual': len(window_data[window_data['temperature_2m_max'] > temp_95th]) / window_size,
-            'heavy_rain_annual': len(window_data[window_data['precipitation_sum'] > precip_95th]) / window_size,
-            'high_wind_annual': len(window_data[window_data['wind_speed_10m_max'] > wind_95th]) / window_size
-        }
+    # Seasonal analysis, binning every column that shares a reduction in one pass
+    temp_means, precip_means = seasonal_mean(
+        seasons, values[:, [col['temperature_2m_mean'], col['precipitation_sum']]]
+    ).T.tolist()
+    temp_maxs, wind_maxs = seasonal_reduce(
+        np.fmax, seasons, values[:, [col['temperature_2m_max'], col['wind_speed_10m_max']]]
+    ).T.tolist()
+    temp_mins = seasonal_reduce(np.fmin, seasons, values[:, [col['temperature_2m_min']]])[:, 0].tolist()
 
-        # Seasonal analysis
-        seasons = {
-            'winter': [12, 1, 2],
-            'spring': [3, 4, 5],
-            'summer': [6, 7, 8],
-            'autumn': [9, 10, 11]
+    seasonal_stats = {
+        season: {
+            'temp_mean': temp_means[code],
+            'temp_max': temp_maxs[code],
+            'temp_min': temp_mins[code],
+            'precip_total': precip_means[code] * 3,  # Approximate seasonal total
+            'wind_max': wind_maxs[code]
         }
+        for code, season in enumerate(SEASONS)
+    }
 
-        seasonal_stats = {}
-        for season, months in seasons.items():
-            season_data = window_data[window_data['month'].isin(months)]
-            seasonal_stats[season] = {
-                'temp_mean': season_data['temperature_2m_mean'].mean(),
-                'temp_max': season_data['temperature_2m_max'].max(),
-                'temp_min': season_data['temperature_2m_min'].min(),
-                'precip_total': season_data['precipitation_sum'].mean() * 3,  # Approximate seasonal total
-                'wind_max': season_data['wind_speed_10m_max'].max()
-            }
+    window_stats = {
+        'means': means,
+        'extremes': extremes,
+        'cumulative': cumulative,
+        'extreme_events': extreme_events,
+        'seasonal': seasonal_stats
+    }
 
-        return {
-            'means': means,
-            'extremes': extremes,
-            'cumulative': cumulative,
-            'extreme_events': extreme_events,
-            'seasonal': seasonal_stats
-        }
+    if len(_window_stats_cache) >= WINDOW_STATS_CACHE_SIZE:
+        del _window_stats_cache[next(iter(_window_stats_cache))]
+    _window_stats_cache[key] = window_stats
+    return window_stats
 
+def analyze_climate_data(frame: ClimateFrame, target_year: int, window_size: int = 5) -> Dict[str, Any]:
+    """
+    Analyze climate data with sophisticated temporal aggregation.
+    
+    Args:
+        frame: Monthly climate data, as returned by get_climate_data
+        target_year: Future year to analyze
+        window_size: Size of window for aggregation (in years)
+    """
     # Get current window (last 5 years of present data)
-    current_data = get_window_stats(datetime.now())
+    current_data = get_window_stats(frame, datetime.now().year, window_size)
     
-    # Get future window (centered on target date)
-    future_data = get_window_stats(target_date)
+    # Get future window (centered on target year)
+    future_data = get_window_stats(frame, target_year, window_size)
     
-    # Calculate changes
-    def compute_changes(current: Dict, future: Dict, prefix: str = '') -> Dict[str, float]:
-        changes = {}
-        for key in current.keys():
-            if isinstance(current[key], dict):
-                changes.update(compute_changes(current[key], future[key], f"{prefix}{key}_"))
-            else:
-                changes[f"{prefix}{key}_change"] = future[key] - current[key]
-        return changes
-
-    changes = compute_changes(current_data, future_data)
+    # Calculate changes as one subtraction over the fixed metric schema
+    deltas = np.subtract(window_stat_values(future_data), window_stat_values(current_data), dtype=float)
+    changes = dict(zip(CHANGE_NAMES, deltas.tolist()))
 
     return {
         'current': current_data,
@@ -256,15 +428,48 @@ def analyze_climate_data(df: pd.DataFrame, target_date: datetime, window_size: i
         'changes': changes
     }
 
-def get_ai_analysis(location_name, df, year):
-    """Get AI analysis of climate impact with comprehensive metrics"""
-    # Read the prompt template
-    prompt_path = Path(__file__).parent / "prompts" / "climate_impact_prompt.txt"
-    with open(prompt_path, 'r') as f:
-        prompt_template = f.read()
+def format_metrics(data) -> str:
+    """Serialize nested metrics as compact JSON with floats rounded to one decimal"""
+    def round_values(value):
+        if isinstance(value, dict):
+            return {key: round_values(item) for key, item in value.items()}
+        return None if value is None else round(float(value), 1)
+
+    return json.dumps(round_values(data), separators=(',', ':'))
+
+PROMPTS_DIR = Path(__file__).parent / "prompts"
+
+@functools.cache
+def _prompt_template():
+    """Read the per-request data template once; it only changes with a redeploy"""
+    return (PROMPTS_DIR / "climate_impact_prompt.txt").read_text()
+
+@functools.cache
+def _system_prompt():
+    """Static analyst instructions, marked so Anthropic caches their prefill between requests
+
+    At roughly 1,500 tokens they clear the 1,024-token minimum cacheable prefix of
+    QUALITY_MODEL but not the 2,048-token minimum of DEFAULT_MODEL, so only detailed
+    analyses get cache hits; the marker is ignored on the default path.
+    """
+    return [{
+        "type": "text",
+        "text": (PROMPTS_DIR / "climate_impact_system.txt").read_text(),
+        "cache_control": {"type": "ephemeral"}
+    }]
+
+def get_ai_analysis(location_name, frame, year, model=DEFAULT_MODEL):
+    """Get AI analysis of climate impact with comprehensive metrics, streamed as text chunks
+
+    The narrative task is light on reasoning, so the faster DEFAULT_MODEL is used unless
+    another model such as QUALITY_MODEL is passed.
+    """
+    return _stream_analysis(_fill_prompt(location_name, frame, year), model)
 
+def _fill_prompt(location_name, frame, year):
+    """Fill the data template with the analysis metrics for one target year"""
     # Get climate analysis data
-    analysis_results = analyze_climate_data(df, year)
+    analysis_results = analyze_climate_data(frame, year)
     
     def format_seasonal_data(period_data, metric_type):
         """Helper function to format seasonal data nicely"""
@@ -320,6 +525,7 @@ def get_ai_analysis(location_name, df, year):
     template_vars = {
         # Basic location info
         "LOCATION_NAME": location_name,
+        "TARGET_YEAR": year,
         
         # Current conditions
         "CURRENT_TEMP_MEAN": f"{analysis_results['current']['means']['temp_mean']:.1f}",
@@ -350,10 +556,10 @@ def get_ai_analysis(location_name, df, year):
         "FUTURE_WIND_MAX": f"{analysis_results['future']['extremes']['wind_max']:.1f}",
 
         # Seasonal analysis
-        "WINTER_CHANGES": format_seasonal_data(analysis_results['future'], 'winter'),
-        "SPRING_CHANGES": format_seasonal_data(analysis_results['future'], 'spring'),
-        "SUMMER_CHANGES": format_seasonal_data(analysis_results['future'], 'summer'),
-        "AUTUMN_CHANGES": format_seasonal_data(analysis_results['future'], 'autumn'),
+        "WINTER_CHANGES": format_metrics(analysis_results['future']['seasonal']['winter']),
+        "SPRING_CHANGES": format_metrics(analysis_results['future']['seasonal']['spring']),
+        "SUMMER_CHANGES": format_metrics(analysis_results['future']['seasonal']['summer']),
+        "AUTUMN_CHANGES": format_metrics(analysis_results['future']['seasonal']['autumn']),
         
         # Extreme events
         "HEAT_EVENTS": f"{analysis_results['future']['extreme_events']['hot_days_annual']:.1f}",
@@ -361,25 +567,72 @@ def get_ai_analysis(location_name, df, year):
         "WIND_EVENTS": f"{analysis_results['future']['extreme_events']['high_wind_annual']:.1f}",
         
         # Additional metrics
-        "CURRENT_SEASONAL_TEMPS": format_seasonal_data(analysis_results['current'], 'temp'),
-        "FUTURE_SEASONAL_TEMPS": format_seasonal_data(analysis_results['future'], 'temp'),
-        "SEASONAL_CHANGES": str(seasonal_changes) if seasonal_changes else "No seasonal change data available",
-        "EXTREME_EVENTS": str(extreme_events) if extreme_events else "No extreme event data available",
+        "CURRENT_SEASONAL_TEMPS": format_metrics(format_seasonal_data(analysis_results['current'], 'temp')),
+        "FUTURE_SEASONAL_TEMPS": format_metrics(format_seasonal_data(analysis_results['future'], 'temp')),
+        "SEASONAL_CHANGES": format_metrics(seasonal_changes) if seasonal_changes else "No seasonal change data available",
+        "EXTREME_EVENTS": format_metrics(extreme_events) if extreme_events else "No extreme event data available",
         "VARIABILITY_METRICS": "Data not available",  # Placeholder for now
         "TREND_METRICS": "Data not available",  # Placeholder for now
     }
     
     # Fill the template with all metrics
-    filled_prompt = prompt_template.format(**template_vars)
-    
-    message = client.messages.create(
-        model="claude-3-5-sonnet-20241022",
+    return _prompt_template().format_map(template_vars)
+
+# Completed responses keyed on the model and filled prompt, oldest evicted first
+_analysis_cache: Dict[tuple, str] = {}
+ANALYSIS_CACHE_SIZE = 256
+
+# Completed responses persisted across restarts, regenerated once older than this
+ANALYSIS_CACHE_DIR = Path('.cache') / 'llm'
+ANALYSIS_CACHE_MAX_AGE = 7 * 86400
+
+def _stream_analysis(filled_prompt, model):
+    """Stream the analysis from Claude, replaying completed responses for repeated prompts"""
+    key = (model, filled_prompt)
+    if key in _analysis_cache:
+        yield _analysis_cache[key]
+        return
+
+    # The system prompt is part of the key on disk, so edited instructions are not served stale answers
+    digest = hashlib.blake2b(
+        "\0".join([model, _system_prompt()[0]["text"], filled_prompt]).encode(), digest_size=16
+    ).hexdigest()
+    path = ANALYSIS_CACHE_DIR / f"{digest}.txt"
+    try:
+        if time.time() - path.stat().st_mtime < ANALYSIS_CACHE_MAX_AGE:
+            response_text = path.read_text(encoding='utf-8')
+            _remember_analysis(key, response_text)
+            yield response_text
+            return
+    except FileNotFoundError:
+        pass
+
+    chunks = []
+    with _get_client().messages.stream(
+        model=model,
         max_tokens=2000,
         temperature=0.4,
-        system="You are a climate impact analyst. Provide detailed, evidence-based projections of climate change effects on daily life.",
+        system=_system_prompt(),
         messages=[
             {"role": "user", "content": filled_prompt}
         ]
-    )
-    
-    return message.content[0].text if isinstance(message.content, list) else message.content
\ No newline at end of file
+    ) as stream:
+        for text in stream.text_stream:
+            chunks.append(text)
+            yield text
+        stop_reason = stream.get_final_message().stop_reason
+
+    # A reply cut off at max_tokens is missing its later sections, so only complete ones are replayed
+    if stop_reason != "end_turn":
+        return
+
+    response_text = "".join(chunks)
+    _remember_analysis(key, response_text)
+    _write_atomically(path, lambda partial_path: partial_path.write_text(response_text, encoding='utf-8'))
+    _prune_cache_dir(ANALYSIS_CACHE_DIR, ANALYSIS_CACHE_MAX_AGE)
+
+def _remember_analysis(key, response_text):
+    """Keep a completed response in memory, evicting the oldest when full"""
+    if len(_analysis_cache) >= ANALYSIS_CACHE_SIZE:
+        del _analysis_cache[next(iter(_analysis_cache))]
+    _analysis_cache[key] = response_text
@@ -1,13 +1,22 @@
+import os
+import threading
 import streamlit as st
-import datetime
-from data_handler import get_location_data, get_climate_data, get_ai_analysis
-from visualization import create_temperature_plot, create_precipitation_plot
-from bs4 import BeautifulSoup
-import pandas as pd
+from data_handler import get_location_data, get_climate_data, get_ai_analysis, warm_clients, DEFAULT_MODEL, QUALITY_MODEL
+from visualization import create_climate_plot
 import re
 
+# Show raw-response diagnostics on the page; off unless CFE_DEBUG=1
+DEBUG = os.environ.get("CFE_DEBUG") == "1"
+
 st.set_page_config(page_title="Climate Future Explorer", layout="wide")
 
+@st.cache_resource(show_spinner=False)
+def _start_client_warmup():
+    """Build the LLM client once per process in the background, off the first submit's path"""
+    threading.Thread(target=warm_clients, daemon=True).start()
+
+_start_client_warmup()
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -38,34 +47,91 @@ Enter your location and adjust the sliders to focus on aspects that matter most
 We'll provide a personalized analysis of how your life might change, backed by data and research.
 """)
 
+def _prefetch_location(address):
+    """Geocode an address and fetch its climate data, leaving both in the data caches"""
+    try:
+        location_data = get_location_data(address)
+        if location_data:
+            get_climate_data(location_data[0], location_data[1])
+    except Exception:
+        # Speculative only; the submit path waits on these calls if still running, or repeats
+        # them, and reports any error
+        pass
+
+def _prefetch():
+    """Start fetching data for a newly entered address before the user presses Analyze"""
+    address = st.session_state.address_input
+    if address:
+        threading.Thread(target=_prefetch_location, args=(address,), daemon=True).start()
+
 col1, col2 = st.columns([2, 1])
 
 with col1:
-    address = st.text_input("Enter your address:", placeholder="e.g., 1234 Main St, Seattle, WA 98101")
+    address = st.text_input("Enter your address:", placeholder="e.g., 1234 Main St, Seattle, WA 98101",
+                            key="address_input", on_change=_prefetch)
 
     submit = st.button("Analyze Future Impact", type="primary")
 
 with col2:
-    year = st.date_input('Enter your date of interest.',
-                         min_value = datetime.date(2029, 1, 1),
-                         max_value=datetime.date(2050,1,1),
-                         format = 'DD/MM/YYYY')
-
-def extract_section_content(response_text, tag_name):
-    """Extract content between XML-like tags"""
-    try:
-        # Make the pattern more flexible to handle potential whitespace and newlines
-        pattern = f"<{tag_name}>\s*(.*?)\s*</{tag_name}>"
-        match = re.search(pattern, response_text, re.DOTALL | re.IGNORECASE)
-        if match:
-            content = match.group(1).strip()
-            return content
-        return ""
-    except Exception as e:
-        st.error(f"Error extracting {tag_name}: {str(e)}")
-        return ""
+    year = st.selectbox('Select your year of interest.', list(range(2029, 2051)), index=0)
+    detailed = st.checkbox("Detailed analysis (slower)")
+
+# Section tags the analysis prompt asks for, with patterns compiled once per process
+_TAGS = (
+    "key_changes",
+    "daily_experience",
+    "economic_impacts",
+    "physical_health",
+    "environment_changes",
+    "comfort_analysis",
+    "energy_implications",
+    "seasonal_details",
+    "outdoor_activities",
+    "adaptation_needs",
+    "uncertainty_notes"
+)
+# Any known section, flexible about whitespace and newlines around the content
+_ALL = re.compile(r"<(" + "|".join(_TAGS) + r")>\s*(.*?)\s*</\1>", re.DOTALL | re.IGNORECASE)
+_CANONICAL_TAGS = {tag.lower(): tag for tag in _TAGS}
+
+# Expander title for each section, in display order
+_SECTION_TITLES = {
+    "key_changes": "🔑 Key Changes",
+    "daily_experience": "🏠 How your days will change",
+    "economic_impacts": "💰 How will the climate affect my wallet?",
+    "physical_health": "🤒 How different you will feel physically",
+    "environment_changes": "🌳 Environmental Impact",
+    "comfort_analysis": "🌡️ Comfort & Living Conditions",
+    "energy_implications": "⚡ Energy Impact",
+    "seasonal_details": "🗓️ Detailed Seasonal Changes",
+    "outdoor_activities": "🏃‍♂️ Outdoor Activities Impact",
+    "adaptation_needs": "🛠️ Adapting to the Changes",
+    "uncertainty_notes": "ℹ️ Uncertainty Factors"
+}
+
+# The headline section, open by default and checked for in the response
+_HEADLINE_TAG = "key_changes"
+
+def stream_sections(chunks, placeholders):
+    """Accumulate streamed text, rendering each section into its placeholder once it closes.
+
+    Returns the full response text and the content of each section, keyed by tag.
+    """
+    response_text = ""
+    sections = {}
+    scan_from = 0  # Everything before this is inside already-closed sections
+    for chunk in chunks:
+        response_text += chunk
+        for match in _ALL.finditer(response_text, scan_from):
+            tag = _CANONICAL_TAGS[match.group(1).lower()]
+            if tag not in sections:
+                sections[tag] = match.group(2).strip()
+                placeholders[tag].markdown(sections[tag])
+            scan_from = match.end()
+    return response_text, sections
 
 if submit and address:
+    status = None
     try:
         # Get location data
         location_data = get_location_data(address)
@@ -73,73 +139,43 @@ if submit and address:
             lat, lon, location_name = location_data
             
             # Get climate data
-            df = get_climate_data(lat, lon)
+            climate_data = get_climate_data(lat, lon)
+
+            status = st.status("Generating analysis...")
 
-            # Get AI analysis
-            response_text = get_ai_analysis(location_name, df, year)
-            
-            # Debug: Print raw response
-            st.write("Debug - Raw Response:", response_text[:200] + "...")
-            
             # Display results
-            st.header(f"What {location_name} will look like in the year {year.year}?")
-            
-            # Weather Patterns Section
-            with st.expander("🌡️ Weather Pattern Changes", expanded=True):
-                weather_content = extract_section_content(response_text, "weatherPatterns")
-                # Debug: Print extracted content
-                st.write("Debug - Extracted Weather Content:", weather_content[:200] if weather_content else "No content found")
-                if weather_content:
-                    st.markdown(weather_content)
-                else:
-                    st.warning("No weather pattern data found in the response")
-
-            # Health Impacts Section
-            with st.expander("🤒 How different you will feel physically", expanded=True):
-                health_content = extract_section_content(response_text, "healthImpacts")
-                st.markdown(health_content)
-
-            # Financial Impact Section
-            with st.expander("💰 How will the climate affect my wallet?", expanded=True):
-                costs_content = extract_section_content(response_text, "livingCosts")
-                st.markdown(costs_content)
-
-            # Environmental Changes Section
-            with st.expander("🌳 Environmental Impact", expanded=True):
-                env_content = extract_section_content(response_text, "environmentalChanges")
-                st.markdown(env_content)
-
-            # Agricultural Effects Section
-            with st.expander("🌾 Agricultural Changes", expanded=True):
-                agri_content = extract_section_content(response_text, "agriculturalEffects")
-                st.markdown(agri_content)
-
-            # Comfort Analysis Section
-            with st.expander("🌡️ Comfort & Living Conditions", expanded=True):
-                comfort_content = extract_section_content(response_text, "comfort_analysis")
-                st.markdown(comfort_content)
-
-            # Energy Implications Section
-            with st.expander("⚡ Energy Impact", expanded=True):
-                energy_content = extract_section_content(response_text, "energy_implications")
-                st.markdown(energy_content)
-
-            # Detailed Seasonal Changes
-            with st.expander("🗓️ Detailed Seasonal Changes", expanded=True):
-                seasonal_content = extract_section_content(response_text, "seasonal_details")
-                st.markdown(seasonal_content)
-
-            # Outdoor Activities Impact
-            with st.expander("🏃‍♂️ Outdoor Activities Impact", expanded=True):
-                outdoor_content = extract_section_content(response_text, "outdoor_activities")
-                st.markdown(outdoor_content)
-
-            # Uncertainty Notes Section
-            with st.expander("ℹ️ Uncertainty Factors", expanded=True):
-                uncertainty_content = extract_section_content(response_text, "uncertaintyNotes")
-                st.markdown(uncertainty_content)
+            st.header(f"What {location_name} will look like in the year {year}?")
+
+            # Temperature and precipitation trends in one figure, shown while the analysis generates
+            st.plotly_chart(create_climate_plot(climate_data.df))
+
+            # Lay out every section up front so each can be filled as soon as it is generated;
+            # only the headline section starts open, the rest are there when the reader wants them
+            expanders = {
+                tag: st.expander(title, expanded=tag == _HEADLINE_TAG)
+                for tag, title in _SECTION_TITLES.items()
+            }
+            placeholders = {tag: expander.empty() for tag, expander in expanders.items()}
+
+            # Get AI analysis, rendering each section as its closing tag streams in
+            response_text, sections = stream_sections(get_ai_analysis(
+                location_name, climate_data, year, model=QUALITY_MODEL if detailed else DEFAULT_MODEL
+            ), placeholders)
+            status.update(label="Analysis complete", state="complete", expanded=False)
+
+            headline_content = sections.get(_HEADLINE_TAG, "")
+            if DEBUG:
+                # Debug: Print raw response and extracted content
+                st.write("Debug - Raw Response:", response_text[:200] + "...")
+                with expanders[_HEADLINE_TAG]:
+                    st.write("Debug - Extracted Key Changes:", headline_content[:200] if headline_content else "No content found")
+            if not headline_content:
+                placeholders[_HEADLINE_TAG].warning("No key changes found in the response")
 
     except Exception as e:
+        # The status sits outside a with block, so it has to be told about the failure
+        if status is not None:
+            status.update(label="Analysis failed", state="error")
         st.error(f"An error occurred: {str(e)}")
 
 
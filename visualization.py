@@ -1,25 +1,33 @@
-import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+import streamlit as st
 
-def create_temperature_plot(df):
-    """Create temperature trend visualization"""
-    fig = px.line(df, x='date', y='temp_max',
-                  title='Maximum Temperature Projection',
-                  labels={'date': 'Year', 'temp_max': 'Temperature (°C)'},
-                  line_shape='spline')
-    fig.update_layout(
-        template='plotly_white',
-        hovermode='x unified'
-    )
-    return fig
+# Common figure layout, with the template object resolved once
+_TPL = pio.templates['plotly_white']
+_COMMON = dict(template=_TPL, hovermode='x unified')
+
+def yearly_summary(df):
+    """Collapse the monthly climate frame to one float32 row per year for plotting"""
+    # A decades-long spline needs no sub-annual detail, and ~100 points serialize far smaller than ~1200
+    return df.groupby('year', as_index=False).agg(
+        temp_max=('temperature_2m_max', 'mean'),
+        precipitation=('precipitation_sum', 'sum')
+    ).astype({'temp_max': 'float32', 'precipitation': 'float32'})
 
-def create_precipitation_plot(df):
-    """Create precipitation trend visualization"""
-    fig = px.line(df, x='date', y='precipitation',
-                  title='Precipitation Projection',
-                  labels={'date': 'Year', 'precipitation': 'Precipitation (mm)'},
-                  line_shape='spline')
-    fig.update_layout(
-        template='plotly_white',
-        hovermode='x unified'
-    )
+# The figure is cached per input frame and shared across sessions; callers must not mutate it
+@st.cache_resource(show_spinner=False)
+def create_climate_plot(df):
+    """Create temperature and precipitation trends as one two-panel figure, sent to the page once"""
+    yearly = yearly_summary(df)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+                        subplot_titles=('Maximum Temperature Projection', 'Precipitation Projection'))
+    fig.add_trace(go.Scatter(x=yearly['year'], y=yearly['temp_max'], name='Temperature',
+                             mode='lines', line_shape='spline'), row=1, col=1)
+    fig.add_trace(go.Scatter(x=yearly['year'], y=yearly['precipitation'], name='Precipitation',
+                             mode='lines', line_shape='spline'), row=2, col=1)
+    fig.update_yaxes(title_text='Temperature (°C)', row=1, col=1)
+    fig.update_yaxes(title_text='Precipitation (mm)', row=2, col=1)
+    fig.update_xaxes(title_text='Year', row=2, col=1)
+    fig.update_layout(showlegend=False, **_COMMON)
     return fig